@@ -8,6 +8,7 @@ from actuators.led import Led
 from helper import GPIO
 from sensors.ultrasonic import run_ultrasonic_loop
 from sensors.pir import run_pir_loop
+from sampling import AdaptiveSampler
 from settings import load_settings
 
 from telemetry import TelemetryEvent, now_ts
@@ -83,12 +84,17 @@ def main() -> None:
     # --- Sensor loops (threads) ---
     dpir_cfg = cfg.get("DPIR1", {"delay_sec": 1.5, "simulated": default_simulated})
     dus_cfg = cfg.get("DUS1", {"delay_sec": 2.0, "simulated": default_simulated})
+    sampler = AdaptiveSampler(dus_cfg.get("adaptive", {"enabled": False}), float(dus_cfg.get("delay_sec", 2.0)))
+
+    def on_motion(motion) -> None:
+        emit("sensor", "DPIR1", bool(motion), None, bool(dpir_cfg.get("simulated", default_simulated)))
+        sampler.on_motion(bool(motion))
 
     t = threading.Thread(
         target=run_pir_loop,
         args=(
             float(dpir_cfg.get("delay_sec", 1.5)),
-            lambda motion: emit("sensor", "DPIR1", bool(motion), None, bool(dpir_cfg.get("simulated", default_simulated))),
+            on_motion,
             stop_event,
         ),
         daemon=True,
@@ -102,6 +108,7 @@ def main() -> None:
             float(dus_cfg.get("delay_sec", 2.0)),
             lambda d: emit("sensor", "DUS1", float(d), "cm", bool(dus_cfg.get("simulated", default_simulated))),
             stop_event,
+            sampler,
         ),
         daemon=True,
     )
@@ -129,6 +136,7 @@ def main() -> None:
                 print(f"DL (Door Light): {'ON' if led.isOn() else 'OFF'}")
                 print(f"DB (Buzzer):     {'ON' if buzzer.isOn() else 'OFF'}")
                 print(f"DS1 (Door Button):     {'ON' if button.isOn() else 'OFF'}")
+                print(f"DUS1 delay:      {sampler.delay:.2f}s")
 
             elif choice == "2":
                 if led.isOn():
@@ -187,6 +195,7 @@ def main() -> None:
 
     finally:
         stop_event.set()
+        sampler.stop()
         time.sleep(0.1)
 
         publisher.stop()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class AdaptiveSampler:
+    """@brief Picks the ultrasonic sampling delay from PIR motion and distance changes.
+
+    Samples at min_delay_sec while there is motion (or for hold_sec after it)
+    and while distance changes faster than rate_threshold_cm_s. Otherwise the
+    delay grows by backoff each sample until it reaches max_delay_sec.
+
+    Speed is measured against a reference reading at least rate_window_sec
+    old and changes below min_change_cm are ignored, so sensor jitter at the
+    fast rate cannot keep the sampler in fast mode.
+    """
+
+    def __init__(
+        self,
+        cfg: Dict[str, Any],
+        default_delay: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._enabled = bool(cfg.get("enabled", True))
+        self._min_delay = float(cfg.get("min_delay_sec", 0.2))
+        self._max_delay = float(cfg.get("max_delay_sec", 5.0))
+        self._hold = float(cfg.get("hold_sec", 10.0))
+        self._rate_threshold = float(cfg.get("rate_threshold_cm_s", 15.0))
+        self._rate_window = float(cfg.get("rate_window_sec", 1.0))
+        self._min_change = float(cfg.get("min_change_cm", 5.0))
+        self._backoff = float(cfg.get("backoff", 1.5))
+        self._clock = clock
+
+        self._default_delay = float(default_delay)
+        self._delay = min(self._max_delay, max(self._min_delay, self._default_delay))
+
+        self._motion = False
+        self._active_until = 0.0
+        self._ref: Optional[tuple[float, float]] = None   # (ts, distance)
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+
+    @property
+    def delay(self) -> float:
+        if not self._enabled:
+            return self._default_delay
+        with self._lock:
+            return self._delay
+
+    def on_motion(self, motion: bool) -> None:
+        """@brief Called from the PIR loop; motion wakes a sleeping sampler right away."""
+        if not self._enabled:
+            return
+        now = self._clock()
+        with self._lock:
+            self._motion = bool(motion)
+            if motion:
+                self._active_until = now + self._hold
+                self._delay = self._min_delay
+        if motion:
+            self._wake.set()
+
+    def on_distance(self, distance: float) -> None:
+        """@brief Called after each ultrasonic reading to compute the next delay."""
+        if not self._enabled:
+            return
+        now = self._clock()
+        with self._lock:
+            if self._ref is None:
+                self._ref = (now, float(distance))
+            else:
+                dt = now - self._ref[0]
+                if dt >= self._rate_window:
+                    change = abs(distance - self._ref[1])
+                    if change >= self._min_change and change / dt >= self._rate_threshold:
+                        self._active_until = now + self._hold
+                    self._ref = (now, float(distance))
+
+            if self._motion or now < self._active_until:
+                self._delay = self._min_delay
+            else:
+                self._delay = min(self._max_delay, self._delay * self._backoff)
+
+    def wait(self, stop_event) -> None:
+        """@brief Sleep for the current delay; returns early on motion or stop."""
+        if not self._enabled:
+            stop_event.wait(self._default_delay)
+            return
+        # clear before waiting so motion reported during the wait is never lost
+        self._wake.clear()
+        if self._stopped or stop_event.is_set():
+            return
+        self._wake.wait(self.delay)
+
+    def stop(self) -> None:
+        """@brief Wake a sleeping sampler so the sensor loop can exit."""
+        self._stopped = True
+        self._wake.set()
@@ -1,16 +1,36 @@
 import random
 import time
-from typing import Callable
+from typing import Callable, Optional
 
+from sampling import AdaptiveSampler
 
-def run_ultrasonic_loop(delay: float, callback: Callable[[float], None], stop_event) -> None:
-    """@brief Simulated ultrasonic distance (cm) using small random walk with occasional close object."""
+
+def run_ultrasonic_loop(
+    delay: float,
+    callback: Callable[[float], None],
+    stop_event,
+    sampler: Optional[AdaptiveSampler] = None,
+) -> None:
+    """@brief Simulated ultrasonic distance (cm) using small random walk with occasional close object.
+
+    With a sampler the delay between readings is adaptive instead of fixed, so
+    the walk and the close-object chance are scaled by elapsed time (tuned per
+    2 s) rather than by the number of readings.
+    """
     distance = 120.0
+    last = time.monotonic()
     while not stop_event.is_set():
-        if random.random() < 0.1:
+        now = time.monotonic()
+        steps = (now - last) / 2.0
+        last = now
+        if random.random() < 1.0 - 0.9 ** steps:
             distance = random.uniform(10.0, 40.0)
         else:
-            distance += random.uniform(-8.0, 8.0)
+            distance += random.uniform(-8.0, 8.0) * steps
             distance = min(200.0, max(5.0, distance))
         callback(round(distance, 1))
-        time.sleep(delay)
+        if sampler is None:
+            time.sleep(delay)
+        else:
+            sampler.on_distance(distance)
+            sampler.wait(stop_event)
@@ -1,22 +1,38 @@
 from __future__ import annotations
 
+import atexit
 import os
-from flask import Flask, jsonify
+from datetime import datetime, timezone
 
+from flask import Flask, Response, jsonify, request, stream_with_context
+
+from device_shadow import DeviceShadow
+from exporter import EXTENSIONS, MIMETYPES, TelemetryExporter, parse_time, resolve_format
 from influx_writer import InfluxWriter
 from mqtt_to_influx import MqttToInfluxService
+from rule_engine import RuleEngine, load_rules
 from config import INFLUX_BUCKET, INFLUX_ORG, INFLUX_TOKEN, INFLUX_URL, MQTT_CLIENT_ID, MQTT_BROKER, MQTT_PORT, MQTT_TOPIC_FILTER
+from config import MQTT_TOPIC_PREFIX, RULES_PATH, SHADOW_PATH, SHADOW_SNAPSHOT_SEC
 
 app = Flask(__name__)
 
 
 influx = InfluxWriter(url=INFLUX_URL, token=INFLUX_TOKEN, org=INFLUX_ORG, bucket=INFLUX_BUCKET)
+exporter = TelemetryExporter(url=INFLUX_URL, token=INFLUX_TOKEN, org=INFLUX_ORG, bucket=INFLUX_BUCKET)
+rules = RuleEngine(load_rules(RULES_PATH), topic_prefix=MQTT_TOPIC_PREFIX)
+shadow = DeviceShadow(SHADOW_PATH, snapshot_interval_sec=SHADOW_SNAPSHOT_SEC)
+shadow.load()
+shadow.start()
+atexit.register(shadow.stop)
 bridge = MqttToInfluxService(
     broker=MQTT_BROKER,
     port=MQTT_PORT,
     topic_filter=MQTT_TOPIC_FILTER,
     client_id=MQTT_CLIENT_ID,
     influx=influx,
+    rules=rules,
+    shadow=shadow,
+    topic_prefix=MQTT_TOPIC_PREFIX,
 )
 bridge.start()
 
@@ -26,5 +42,48 @@ def health():
     return jsonify({"status": "ok"})
 
 
+@app.get("/api/devices/<device_id>/state")
+def device_state(device_id: str):
+    state = shadow.get(device_id)
+    if state is None:
+        return jsonify({"error": f"unknown device {device_id}"}), 404
+    return jsonify(state)
+
+
+@app.get("/api/rules")
+def list_rules():
+    return jsonify([
+        {
+            "name": r.name,
+            "cooldown_sec": r.cooldown_sec,
+            "when": [
+                {"code": c.code, "op": c.op, "value": c.value, "window_sec": c.window_sec, "agg": c.agg}
+                for c in r.conditions
+            ],
+        }
+        for r in rules.rules
+    ])
+
+
+@app.get("/api/export")
+def export():
+    device = request.args.get("device")
+    code = request.args.get("code")
+    try:
+        fmt = resolve_format(request.args.get("format"))
+        start = parse_time(request.args.get("start"))
+        stop = parse_time(request.args.get("stop"), default=datetime.now(timezone.utc))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    filename = f"export_{device or 'all'}_{code or 'all'}{EXTENSIONS[fmt]}"
+    body = exporter.stream(fmt, start, stop, device=device, code=code)
+    return Response(
+        stream_with_context(body),
+        mimetype=MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=False)
@@ -12,3 +12,10 @@ MQTT_CLIENT_ID = os.getenv("MQTT_CLIENT_ID")
 MQTT_BROKER = os.getenv("MQTT_BROKER")
 MQTT_PORT = int(os.getenv("MQTT_PORT", "1883"))
 MQTT_TOPIC_FILTER = os.getenv("MQTT_TOPIC_FILTER")
+MQTT_TOPIC_PREFIX = os.getenv("MQTT_TOPIC_PREFIX", "iot/smart-house")
+
+# relative paths are resolved against the server/ directory
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+RULES_PATH = os.path.join(SERVER_DIR, os.getenv("RULES_PATH", "rules.json"))
+SHADOW_PATH = os.path.join(SERVER_DIR, os.getenv("SHADOW_PATH", "shadow.json"))
+SHADOW_SNAPSHOT_SEC = float(os.getenv("SHADOW_SNAPSHOT_SEC", "5"))
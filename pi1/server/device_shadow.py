@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class DeviceShadow:
+    """@brief In-memory latest state per device, snapshotted to disk.
+
+    Each device entry is replaced (never mutated) on update, so readers get
+    a consistent dict with a single lookup and no copying.
+    """
+
+    def __init__(self, snapshot_path: str, snapshot_interval_sec: float = 5.0) -> None:
+        self._path = Path(snapshot_path)
+        self._interval = float(snapshot_interval_sec)
+        self._devices: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self) -> None:
+        if not self._path.exists():
+            return
+        try:
+            with self._path.open("r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except Exception as e:
+            print(f"[shadow] could not load snapshot {self._path}: {e}")
+            return
+        with self._lock:
+            self._devices = {str(k): v for k, v in raw.items() if isinstance(v, dict)}
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        self.snapshot()
+
+    def get(self, device: str) -> Optional[Dict[str, Any]]:
+        return self._devices.get(device)
+
+    def update(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """@brief Apply one TelemetryEvent payload; return a delta only if the value changed."""
+        device = str(payload.get("device", "unknown"))
+        code = str(payload.get("code", "unknown"))
+        value = payload.get("value", None)
+        ts = float(payload.get("ts", 0.0))
+
+        with self._lock:
+            current = self._devices.get(device)
+            state = current["state"] if current else {}
+            version = current["version"] if current else 0
+
+            prev = state.get(code)
+            if prev is not None and ts < prev["ts"]:
+                # late / out-of-order event
+                return None
+            changed = prev is None or prev["value"] != value
+            if not changed and prev["ts"] == ts:
+                return None
+
+            state = dict(state)
+            state[code] = {"value": value, "ts": ts}
+            if changed:
+                version += 1
+            last_ts = max(ts, current["ts"]) if current else ts
+            self._devices[device] = {"device": device, "version": version, "ts": last_ts, "state": state}
+            self._dirty = True
+
+        if not changed:
+            return None
+        return {
+            "device": device,
+            "kind": "shadow",
+            "code": code,
+            "value": value,
+            "ts": ts,
+            "version": version,
+        }
+
+    def snapshot(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            # entries are immutable, a shallow copy is enough to dump outside the lock
+            devices = dict(self._devices)
+            self._dirty = False
+        tmp = self._path.with_suffix(self._path.suffix + ".tmp")
+        try:
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(devices, f, ensure_ascii=False)
+            os.replace(tmp, self._path)
+        except Exception as e:
+            print(f"[shadow] snapshot failed: {e}")
+            with self._lock:
+                self._dirty = True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.snapshot()
@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import io
+import re
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from influxdb_client import InfluxDBClient
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except Exception:
+    pa = None
+
+
+COLUMNS = [
+    "time", "device", "device_name", "kind", "code", "unit", "simulated",
+    "value_num", "value_bool", "value_str",
+]
+
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv.gz"}
+MIMETYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "csv": "application/gzip",
+}
+
+_RELATIVE = re.compile(r"^-(\d+)([smhd])$")
+_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+
+@dataclass
+class ExportStats:
+    """@brief Result of one export run."""
+    format: str
+    rows: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.rows} rows, {self.bytes} bytes ({self.format}) in {self.seconds:.2f}s "
+            f"-> {self.rows_per_sec:.0f} rows/s"
+        )
+
+
+def parse_time(value: Optional[str], default: Optional[datetime] = None) -> datetime:
+    """@brief Parse ISO 8601 ("2026-01-31T12:00:00Z") or relative ("-7d", "-12h") time."""
+    if not value:
+        if default is None:
+            raise ValueError("time value is required")
+        return default
+    m = _RELATIVE.match(value.strip())
+    if m:
+        return datetime.now(timezone.utc) - timedelta(**{_UNITS[m.group(2)]: int(m.group(1))})
+    dt = datetime.fromisoformat(value.strip())
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def resolve_format(fmt: Optional[str]) -> str:
+    """@brief Pick the output format; None means parquet, or csv without pyarrow.
+
+    An explicitly requested parquet/arrow format raises ValueError when
+    pyarrow is not installed instead of silently switching to csv.
+    """
+    if fmt is None:
+        return "parquet" if pa is not None else "csv"
+    fmt = fmt.lower()
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"unknown export format {fmt!r}")
+    if fmt != "csv" and pa is None:
+        raise ValueError(f"format {fmt!r} requires pyarrow (pip install -r server/requirements.txt)")
+    return fmt
+
+
+def format_from_path(path: str) -> Optional[str]:
+    """@brief Format implied by a file name, e.g. "x.parquet" -> "parquet"."""
+    for fmt, ext in EXTENSIONS.items():
+        if path.lower().endswith(ext):
+            return fmt
+    return None
+
+
+class _DrainSink(io.RawIOBase):
+    """@brief Write-only buffer that is emptied after every chunk (for HTTP streaming)."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._parts: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+
+class _CsvWriter:
+    def __init__(self, sink) -> None:
+        self._gz = gzip.GzipFile(fileobj=sink, mode="wb")
+        self._text = io.TextIOWrapper(self._gz, encoding="utf-8", newline="")
+        self._csv = csv.writer(self._text)
+        self._csv.writerow(COLUMNS)
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        for r in rows:
+            t = r["time"]
+            self._csv.writerow([t.isoformat() if t is not None else ""] + [
+                "" if r[c] is None else r[c] for c in COLUMNS[1:]
+            ])
+        self._text.flush()
+
+    def close(self) -> None:
+        self._text.flush()
+        self._text.detach()
+        self._gz.close()
+
+
+class _ArrowWriter:
+    def __init__(self, sink, fmt: str) -> None:
+        self._schema = pa.schema([
+            ("time", pa.timestamp("ns", tz="UTC")),
+            ("device", pa.string()),
+            ("device_name", pa.string()),
+            ("kind", pa.string()),
+            ("code", pa.string()),
+            ("unit", pa.string()),
+            ("simulated", pa.bool_()),
+            ("value_num", pa.float64()),
+            ("value_bool", pa.bool_()),
+            ("value_str", pa.string()),
+        ])
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(sink, self._schema, compression="zstd")
+        else:
+            options = pa_ipc.IpcWriteOptions(compression="zstd")
+            self._writer = pa_ipc.new_stream(sink, self._schema, options=options)
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        self._writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def open_writer(fmt: str, sink):
+    """@brief Incremental writer for `fmt` (already resolved) on a binary file-like sink."""
+    if fmt == "csv":
+        return _CsvWriter(sink)
+    return _ArrowWriter(sink, fmt)
+
+
+class TelemetryExporter:
+    """@brief Streams telemetry out of InfluxDB in time-chunked queries.
+
+    Each chunk is read with query_stream and handed on in batches of at
+    most batch_rows, so memory stays flat regardless of the time range.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        org: str,
+        bucket: str,
+        chunk: timedelta = timedelta(hours=6),
+        batch_rows: int = 10_000,
+    ) -> None:
+        self._client = InfluxDBClient(url=url, token=token, org=org)
+        self._query_api = self._client.query_api()
+        self._org = org
+        self._bucket = bucket
+        self._chunk = chunk
+        self._batch_rows = batch_rows
+
+    def close(self) -> None:
+        try:
+            self._client.close()
+        except Exception:
+            pass
+
+    def iter_batches(
+        self,
+        start: datetime,
+        stop: datetime,
+        device: Optional[str] = None,
+        code: Optional[str] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        batch: List[Dict[str, Any]] = []
+        chunk_start = start
+        while chunk_start < stop:
+            chunk_stop = min(stop, chunk_start + self._chunk)
+            query = self._flux(chunk_start, chunk_stop, device, code)
+            for record in self._query_api.query_stream(query, org=self._org):
+                batch.append(_row(record.values))
+                if len(batch) >= self._batch_rows:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+                batch = []
+            chunk_start = chunk_stop
+
+    def export(
+        self,
+        sink,
+        fmt: str,
+        start: datetime,
+        stop: datetime,
+        device: Optional[str] = None,
+        code: Optional[str] = None,
+    ) -> ExportStats:
+        """@brief Write the range to an open binary file."""
+        stats = ExportStats(format=resolve_format(fmt))
+        t0 = time.perf_counter()
+        writer = open_writer(stats.format, sink)
+        try:
+            for batch in self.iter_batches(start, stop, device, code):
+                writer.write(batch)
+                stats.rows += len(batch)
+        finally:
+            writer.close()
+        stats.seconds = time.perf_counter() - t0
+        stats.bytes = sink.tell()
+        return stats
+
+    def stream(
+        self,
+        fmt: str,
+        start: datetime,
+        stop: datetime,
+        device: Optional[str] = None,
+        code: Optional[str] = None,
+    ) -> Iterator[bytes]:
+        """@brief Same as export(), but yields the encoded bytes chunk by chunk."""
+        stats = ExportStats(format=resolve_format(fmt))
+        t0 = time.perf_counter()
+        sink = _DrainSink()
+        writer = open_writer(stats.format, sink)
+        closed = False
+        try:
+            for batch in self.iter_batches(start, stop, device, code):
+                writer.write(batch)
+                stats.rows += len(batch)
+                data = sink.drain()
+                if data:
+                    yield data
+            writer.close()
+            closed = True
+            data = sink.drain()
+            if data:
+                yield data
+        finally:
+            # client disconnect (GeneratorExit) or a failed query lands here
+            if not closed:
+                try:
+                    writer.close()
+                except Exception:
+                    pass
+            stats.seconds = time.perf_counter() - t0
+            stats.bytes = sink.tell()
+            print(f"[export] {stats}" + ("" if closed else " (aborted)"))
+
+    def _flux(self, start: datetime, stop: datetime, device: Optional[str], code: Optional[str]) -> str:
+        filters = ['r._measurement == "telemetry"']
+        if device:
+            filters.append(f"r.device == {_flux_str(device)}")
+        if code:
+            filters.append(f"r.code == {_flux_str(code)}")
+        return (
+            f'from(bucket: {_flux_str(self._bucket)})\n'
+            f'  |> range(start: {_flux_time(start)}, stop: {_flux_time(stop)})\n'
+            f'  |> filter(fn: (r) => {" and ".join(filters)})\n'
+            f'  |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")\n'
+            f'  |> group()\n'
+            f'  |> sort(columns: ["_time"])\n'
+        )
+
+
+def _flux_str(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _flux_time(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _row(values: Dict[str, Any]) -> Dict[str, Any]:
+    value_num = values.get("value_num")
+    value_bool = values.get("value_bool")
+    value_str = values.get("value_str")
+    return {
+        "time": values.get("_time"),
+        "device": values.get("device"),
+        "device_name": values.get("device_name"),
+        "kind": values.get("kind"),
+        "code": values.get("code"),
+        "unit": values.get("unit"),
+        "simulated": str(values.get("simulated", "")).lower() == "true",
+        "value_num": float(value_num) if value_num is not None else None,
+        "value_bool": bool(value_bool) if value_bool is not None else None,
+        "value_str": str(value_str) if value_str is not None else None,
+    }
+
+
+def _join_relative_times(argv: List[str]) -> List[str]:
+    """@brief Turn "--start -30d" into "--start=-30d"; argparse reads "-30d" as an option."""
+    out: List[str] = []
+    i = 0
+    while i < len(argv):
+        if argv[i] in ("--start", "--stop") and i + 1 < len(argv) and _RELATIVE.match(argv[i + 1]):
+            out.append(f"{argv[i]}={argv[i + 1]}")
+            i += 2
+        else:
+            out.append(argv[i])
+            i += 1
+    return out
+
+
+def main() -> None:
+    from config import INFLUX_BUCKET, INFLUX_ORG, INFLUX_TOKEN, INFLUX_URL
+
+    parser = argparse.ArgumentParser(description="Export telemetry from InfluxDB to a columnar file.")
+    parser.add_argument("--device", help="device tag, e.g. PI1")
+    parser.add_argument("--code", help="code tag, e.g. DUS1")
+    parser.add_argument("--start", required=True, help='ISO 8601 time or relative, e.g. "-30d"')
+    parser.add_argument("--stop", help="ISO 8601 time or relative (default: now)")
+    parser.add_argument(
+        "--format",
+        choices=sorted(EXTENSIONS),
+        help="default: from --out extension, else parquet (csv without pyarrow)",
+    )
+    parser.add_argument("--chunk-hours", type=float, default=6.0, help="time span of one Influx query")
+    parser.add_argument("--out", help="output file (default: export_<device>_<code><ext>)")
+    args = parser.parse_args(_join_relative_times(sys.argv[1:]))
+
+    requested = args.format or (format_from_path(args.out) if args.out else None)
+    try:
+        fmt = resolve_format(requested)
+        start = parse_time(args.start)
+        stop = parse_time(args.stop, default=datetime.now(timezone.utc))
+    except ValueError as e:
+        parser.error(str(e))
+    out = args.out or f"export_{args.device or 'all'}_{args.code or 'all'}{EXTENSIONS[fmt]}"
+
+    exporter = TelemetryExporter(
+        url=INFLUX_URL,
+        token=INFLUX_TOKEN,
+        org=INFLUX_ORG,
+        bucket=INFLUX_BUCKET,
+        chunk=timedelta(hours=args.chunk_hours),
+    )
+    try:
+        with open(out, "wb") as f:
+            stats = exporter.export(f, fmt, start, stop, device=args.device, code=args.code)
+    finally:
+        exporter.close()
+    print(f"[export] {out}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,23 @@ from __future__ import annotations
 
 import json
 import threading
+from queue import Queue, Empty
 from typing import Any, Dict, Optional, Callable
 
 import paho.mqtt.client as mqtt
 
+from device_shadow import DeviceShadow
 from influx_writer import InfluxWriter
+from rule_engine import RuleEngine
 
 
 class MqttToInfluxService:
-    """@brief Subscribes to MQTT topics and writes payloads into InfluxDB."""
+    """@brief Subscribes to MQTT topics and writes payloads into InfluxDB.
+
+    Influx writes are blocking HTTP calls, so they run on a worker thread fed
+    by a Queue. The paho callback only parses, evaluates rules and updates the
+    shadow; paho sends queued publishes when the callback returns.
+    """
 
     def __init__(
         self,
@@ -19,18 +27,30 @@ class MqttToInfluxService:
         topic_filter: str,
         client_id: str,
         influx: InfluxWriter,
+        rules: Optional[RuleEngine] = None,
+        shadow: Optional[DeviceShadow] = None,
+        topic_prefix: str = "iot/smart-house",
     ) -> None:
         self._broker = broker
         self._port = port
         self._topic_filter = topic_filter
         self._client_id = client_id
         self._influx = influx
+        self._rules = rules
+        self._shadow = shadow
+        self._topic_prefix = topic_prefix.rstrip("/")
+
+        self._q: "Queue[Dict[str, Any]]" = Queue()
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
 
         self._client = mqtt.Client(client_id=self._client_id, clean_session=True)
         self._client.on_connect = self._on_connect
         self._client.on_message = self._on_message
 
     def start(self) -> None:
+        self._writer = threading.Thread(target=self._run_writer, daemon=True)
+        self._writer.start()
         self._client.connect(self._broker, self._port, keepalive=60)
         self._client.loop_start()
 
@@ -43,6 +63,9 @@ class MqttToInfluxService:
             self._client.disconnect()
         except Exception:
             pass
+        self._stop.set()
+        if self._writer:
+            self._writer.join(timeout=2.0)
 
     def _on_connect(self, client, userdata, flags, rc) -> None:
         if rc == 0:
@@ -52,6 +75,48 @@ class MqttToInfluxService:
         try:
             payload = json.loads(msg.payload.decode("utf-8"))
             if isinstance(payload, dict):
-                self._influx.write_event(payload)
+                if payload.get("kind") == "shadow":
+                    # our own retained deltas coming back through the topic filter
+                    return
+                self._evaluate_rules(client, payload)
+                self._update_shadow(client, payload)
+                # rule hits (kind "alert") are stored in Influx on purpose, as alert history
+                self._q.put(payload)
         except Exception:
             pass
+
+    def _run_writer(self) -> None:
+        # drain what is left after stop so queued events are not lost
+        while not self._stop.is_set() or not self._q.empty():
+            try:
+                payload = self._q.get(timeout=0.5)
+            except Empty:
+                continue
+            try:
+                self._influx.write_event(payload)
+            except Exception as e:
+                print(f"[influx] write failed: {e}")
+
+    def _evaluate_rules(self, client, payload: Dict[str, Any]) -> None:
+        if self._rules is None:
+            return
+        try:
+            hits = self._rules.process(payload)
+        except Exception as e:
+            print(f"[rules] evaluation failed: {e}")
+            return
+        for topic, out in hits:
+            # from the paho thread publish only queues the packet; it is sent once this callback returns
+            client.publish(topic, json.dumps(out, ensure_ascii=False), qos=1, retain=False)
+
+    def _update_shadow(self, client, payload: Dict[str, Any]) -> None:
+        if self._shadow is None:
+            return
+        if payload.get("kind") == "alert":
+            # rule hits are one-shot and never reset, they are not device state
+            return
+        delta = self._shadow.update(payload)
+        if delta is None:
+            return
+        topic = f"{self._topic_prefix}/{delta['device']}/shadow/{delta['code']}"
+        client.publish(topic, json.dumps(delta, ensure_ascii=False), qos=1, retain=True)
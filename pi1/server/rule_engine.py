@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import json
+import operator
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+_OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+_AGGS = ("last", "any", "all", "min", "max", "avg")
+
+
+@dataclass(frozen=True)
+class Condition:
+    """@brief One comparison against a code's samples, e.g. DUS1 < 20.
+
+    With window_sec == 0 only the latest sample is checked, otherwise
+    `agg` is applied over the samples seen in the last window_sec seconds.
+    Windows only see reported samples, not held state: for codes that only
+    report transitions (DPIR1) use the latest value without a window.
+    """
+    code: str
+    op: str
+    value: Any
+    window_sec: float = 0.0
+    agg: str = "last"
+
+    def matches(self, samples: Deque[Tuple[float, Any]], now: float) -> bool:
+        if not samples:
+            return False
+        cmp = _OPS[self.op]
+
+        if self.window_sec <= 0 or self.agg == "last":
+            ts, value = samples[-1]
+            if self.window_sec > 0 and ts < now - self.window_sec:
+                return False
+            return _safe_cmp(cmp, value, self.value)
+
+        since = now - self.window_sec
+        values = [v for ts, v in samples if ts >= since]
+        if not values:
+            return False
+
+        if self.agg == "any":
+            return any(_safe_cmp(cmp, v, self.value) for v in values)
+        if self.agg == "all":
+            return all(_safe_cmp(cmp, v, self.value) for v in values)
+
+        nums = [float(v) for v in values if isinstance(v, (int, float))]
+        if not nums:
+            return False
+        if self.agg == "min":
+            agg_value = min(nums)
+        elif self.agg == "max":
+            agg_value = max(nums)
+        else:
+            agg_value = sum(nums) / len(nums)
+        return _safe_cmp(cmp, agg_value, self.value)
+
+
+@dataclass(frozen=True)
+class Rule:
+    """@brief Named set of conditions that must all hold for the same device.
+
+    A rule fires once when it becomes true (rising edge) and is re-armed
+    when it turns false again; cooldown_sec limits how often it can fire.
+    """
+    name: str
+    conditions: Tuple[Condition, ...]
+    cooldown_sec: float = 0.0
+    topic: Optional[str] = None     # overrides {prefix}/{device}/alert/{name}
+    value: Any = True
+
+    @property
+    def codes(self) -> Tuple[str, ...]:
+        return tuple(dict.fromkeys(c.code for c in self.conditions))
+
+
+@dataclass
+class _DeviceState:
+    """@brief Per-device sliding windows and per-rule edge/cooldown state."""
+    samples: Dict[str, Deque[Tuple[float, Any]]] = field(default_factory=dict)
+    active: Dict[str, bool] = field(default_factory=dict)
+    last_fired: Dict[str, float] = field(default_factory=dict)
+
+
+class RuleEngine:
+    """@brief Incremental rule evaluation over the incoming telemetry stream.
+
+    Rules are indexed by code so an event only re-evaluates the rules that
+    reference it. Each device keeps a bounded window of samples per code,
+    trimmed to the longest window any rule needs for that code.
+    """
+
+    def __init__(self, rules: List[Rule], topic_prefix: str) -> None:
+        self._rules = list(rules)
+        self._topic_prefix = topic_prefix.rstrip("/")
+        self._by_code: Dict[str, List[Rule]] = {}
+        self._window: Dict[str, float] = {}
+        self._devices: Dict[str, _DeviceState] = {}
+
+        for rule in self._rules:
+            for code in rule.codes:
+                self._by_code.setdefault(code, []).append(rule)
+            for c in rule.conditions:
+                self._window[c.code] = max(self._window.get(c.code, 0.0), c.window_sec)
+
+    @property
+    def rules(self) -> List[Rule]:
+        return list(self._rules)
+
+    def process(self, payload: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """@brief Feed one TelemetryEvent payload; return (topic, payload) hits to publish."""
+        code = str(payload.get("code", ""))
+        rules = self._by_code.get(code)
+        if not rules:
+            return []
+
+        device = str(payload.get("device", "unknown"))
+        ts = float(payload.get("ts", 0.0)) or time.time()
+        state = self._devices.setdefault(device, _DeviceState())
+
+        samples = state.samples.get(code)
+        if samples is None:
+            samples = state.samples[code] = deque()
+        samples.append((ts, payload.get("value")))
+        self._trim(samples, ts - self._window.get(code, 0.0))
+
+        hits: List[Tuple[str, Dict[str, Any]]] = []
+        for rule in rules:
+            ok = all(c.matches(state.samples.get(c.code, _EMPTY), ts) for c in rule.conditions)
+            was_active = state.active.get(rule.name, False)
+            state.active[rule.name] = ok
+            if not ok or was_active:
+                continue
+            last = state.last_fired.get(rule.name)
+            if last is not None and ts - last < rule.cooldown_sec:
+                continue
+            state.last_fired[rule.name] = ts
+            hits.append(self._hit(rule, device, payload, ts))
+        return hits
+
+    def _hit(self, rule: Rule, device: str, source: Dict[str, Any], ts: float) -> Tuple[str, Dict[str, Any]]:
+        topic = rule.topic or f"{self._topic_prefix}/{device}/alert/{rule.name}"
+        out = {
+            "device": device,
+            "device_name": source.get("device_name", "unknown"),
+            "kind": "alert",
+            "code": rule.name,
+            "value": rule.value,
+            "unit": None,
+            "simulated": bool(source.get("simulated", True)),
+            "ts": ts,
+        }
+        return topic, out
+
+    @staticmethod
+    def _trim(samples: Deque[Tuple[float, Any]], since: float) -> None:
+        # always keep the latest sample so "last" conditions still see it
+        while len(samples) > 1 and samples[0][0] < since:
+            samples.popleft()
+
+
+_EMPTY: Deque[Tuple[float, Any]] = deque()
+
+
+def _safe_cmp(cmp: Callable[[Any, Any], bool], a: Any, b: Any) -> bool:
+    try:
+        return bool(cmp(a, b))
+    except TypeError:
+        return False
+
+
+def load_rules(path: str) -> List[Rule]:
+    """@brief Load rules from JSON file. Missing file means no rules."""
+    p = Path(path)
+    if not p.exists():
+        return []
+    with p.open("r", encoding="utf-8") as f:
+        raw = json.load(f)
+
+    rules: List[Rule] = []
+    for r in raw.get("rules", []):
+        conditions = []
+        for c in r.get("when", []):
+            op = str(c.get("op", "=="))
+            agg = str(c.get("agg", "last"))
+            if op not in _OPS:
+                raise ValueError(f"rule {r.get('name')}: unknown op {op!r}")
+            if agg not in _AGGS:
+                raise ValueError(f"rule {r.get('name')}: unknown agg {agg!r}")
+            conditions.append(
+                Condition(
+                    code=str(c["code"]),
+                    op=op,
+                    value=c.get("value"),
+                    window_sec=float(c.get("window_sec", 0.0)),
+                    agg=agg,
+                )
+            )
+        rules.append(
+            Rule(
+                name=str(r["name"]),
+                conditions=tuple(conditions),
+                cooldown_sec=float(r.get("cooldown_sec", 0.0)),
+                topic=r.get("topic"),
+                value=r.get("value", True),
+            )
+        )
+    return rules